@@ -92,7 +92,7 @@ export default function ScheduleGenerator() {
 
             console.log("Sending data to server:", dataToSend);
 
-            const response = await fetch('http://127.0.0.1:5000/api/user', {
+            const response = await fetch('http://127.0.0.1:5000/api/jobs', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
@@ -100,13 +100,29 @@ export default function ScheduleGenerator() {
                 body: JSON.stringify(dataToSend),
             });
 
+            if (response.status === 429) {
+                throw new Error("The scheduler is busy, please try again in a few seconds.");
+            }
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
             }
 
-            const result = await response.json();
-            console.log("Response from Flask backend:", result);
-            setScheduleData(result);
+            // Poll the job until the server finishes optimizing
+            let job = await response.json();
+            while (job.status === 'queued' || job.status === 'running') {
+                await new Promise(resolve => setTimeout(resolve, 500));
+                const jobResponse = await fetch(`http://127.0.0.1:5000/api/jobs/${job.jobId}`);
+                if (!jobResponse.ok) {
+                    throw new Error(`HTTP error! status: ${jobResponse.status}`);
+                }
+                job = await jobResponse.json();
+            }
+            if (job.status !== 'done') {
+                throw new Error(job.error || `Schedule job ${job.status}`);
+            }
+
+            console.log("Response from Flask backend:", job);
+            setScheduleData({ message: "Schedules optimized successfully", ...job.result });
         } catch (error) {
             console.error("Error sending data to Flask backend:", error);
             setError((error as Error).message);
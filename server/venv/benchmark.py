@@ -0,0 +1,185 @@
+"""Offline benchmark for the schedule optimizers.
+
+Runs the hybrid and standalone PSO solvers repeatedly against recorded
+/api/user payloads or synthetic ones, with fixed seeds, and compares the
+results against a saved baseline.
+
+    python benchmark.py --fixture fixtures/sample_request.json --runs 25
+    python benchmark.py --synthetic 1_1 --save-baseline baseline.json
+    python benchmark.py --synthetic 1_1 --baseline baseline.json
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+from catalog import catalog
+from metrics import work
+from scheduler import (
+    select_sections, required_subjects_for, fitness,
+    optimize_schedule, particle_swarm_optimization,
+)
+
+DAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']
+TIMES = ['7:30-9:00', '9:00-10:30', '10:30-12:00', '13:00-14:30', '14:30-16:00', '16:00-17:30']
+
+
+def load_fixture(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def synthetic_fixture(year_level, sem_year, num_sections=6, seed=0):
+    # Same shape as the frontend payload: one Firestore document per section
+    rng = random.Random(seed)
+    subject_codes = list(catalog.semesters.get(catalog.semester_key(year_level, sem_year), {}))
+    user_data = {}
+    for n in range(num_sections):
+        name = f"{year_level}_{sem_year}_{chr(ord('A') + n)}"
+        section = {code: f"{rng.choice(DAYS)} | {rng.choice(TIMES)}" for code in subject_codes}
+        section['documentName'] = name
+        user_data[name] = section
+    return {
+        'userData': user_data,
+        'yearLevel': str(year_level),
+        'semesterYear': str(sem_year),
+        'availableDay': rng.sample(DAYS, 4),
+        'backSubjects': [''],
+    }
+
+
+# Reported separately because each counts a different unit of work: full
+# fitness() rescoring calls, single candidate deltas, decoded swarm particles
+# and constructed ants
+RATE_KINDS = {'fitness_evals': 'fitness', 'delta_evals': 'delta', 'swarm_evals': 'particle', 'colony_evals': 'ant'}
+
+
+def evaluations():
+    counts = work.snapshot()
+    return {kind: counts[kind] for kind in RATE_KINDS}
+
+
+def summarize(values):
+    ordered = sorted(values)
+    return {
+        'mean': statistics.mean(values),
+        'std_dev': statistics.stdev(values) if len(values) > 1 else 0.0,
+        'min': ordered[0],
+        'max': ordered[-1],
+        'p50': ordered[len(ordered) // 2],
+        'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+    }
+
+
+def run_fixture(payload, num_runs=25, seed=0, warmup=3):
+    sections = select_sections(payload['userData'], payload['yearLevel'], payload['semesterYear'])
+    available_days = payload['availableDay']
+    back_subjects = payload['backSubjects']
+    required_subjects = required_subjects_for(payload['yearLevel'], payload['semesterYear'], back_subjects)
+
+    data = {name: {'scores': [], 'times': [], 'evals': dict.fromkeys(RATE_KINDS, 0)} for name in ('hybrid', 'pso')}
+
+    def timed(name, solve):
+        evals_before = evaluations()
+        start_time = time.perf_counter()
+        score = solve()
+        data[name]['times'].append(time.perf_counter() - start_time)
+        data[name]['scores'].append(score)
+        for kind, count in evaluations().items():
+            data[name]['evals'][kind] += count - evals_before[kind]
+
+    # Warm-up runs fill caches and lazy imports and are not recorded
+    for run in range(-warmup, num_runs):
+        rng = random.Random(seed + run)
+        timed('hybrid', lambda: fitness(
+            optimize_schedule(sections, available_days, back_subjects, required_subjects, rng=rng),
+            available_days, back_subjects, required_subjects))
+        timed('pso', lambda: particle_swarm_optimization(
+            sections, available_days, back_subjects, required_subjects, rng=rng)[1])
+        if run < 0:
+            for d in data.values():
+                d.update(scores=[], times=[], evals=dict.fromkeys(RATE_KINDS, 0))
+
+    return {
+        name: {
+            'score': summarize(d['scores']),
+            'time': summarize(d['times']),
+            'rates': {kind: count / sum(d['times']) if sum(d['times']) else 0.0
+                      for kind, count in d['evals'].items()},
+        }
+        for name, d in data.items()
+    }
+
+
+def find_regressions(results, baseline, score_tolerance, time_tolerance, time_slack=0.005):
+    # Times are compared by median, with time_slack seconds on top of the
+    # relative tolerance so scheduler noise on millisecond runs can't fail the gate
+    regressions = []
+    for fixture, algorithms in results.items():
+        for name, stats in algorithms.items():
+            base = baseline.get(fixture, {}).get(name)
+            if not base:
+                continue
+            score_floor = base['score']['mean'] - abs(base['score']['mean']) * score_tolerance
+            if stats['score']['mean'] < score_floor:
+                regressions.append(f"{fixture}/{name}: mean score {stats['score']['mean']:.2f} < baseline {base['score']['mean']:.2f}")
+            time_ceiling = base['time']['p50'] * (1 + time_tolerance) + time_slack
+            if stats['time']['p50'] > time_ceiling:
+                regressions.append(f"{fixture}/{name}: median time {stats['time']['p50']:.4f}s > baseline {base['time']['p50']:.4f}s")
+    return regressions
+
+
+def print_report(results):
+    for fixture, algorithms in results.items():
+        print(fixture)
+        for name, stats in algorithms.items():
+            score, run_time = stats['score'], stats['time']
+            print(f"  {name:<7} score mean {score['mean']:8.2f}  std {score['std_dev']:6.2f}  "
+                  f"min {score['min']:6}  max {score['max']:6}")
+            rates = '  '.join(f"{rate:,.0f} {RATE_KINDS[kind]}/s" for kind, rate in stats['rates'].items() if rate)
+            print(f"  {'':<7} time  mean {run_time['mean']:8.4f}s p50 {run_time['p50']:.4f}s "
+                  f"p95 {run_time['p95']:.4f}s  {rates}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fixture', action='append', default=[], help='recorded /api/user request body (JSON)')
+    parser.add_argument('--synthetic', action='append', default=[], metavar='YEAR_SEM', help='generate a payload, e.g. 1_1')
+    parser.add_argument('--runs', type=int, default=25)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', help='compare against a saved baseline and exit 1 on regression')
+    parser.add_argument('--save-baseline', help='write the results as a new baseline')
+    parser.add_argument('--score-tolerance', type=float, default=0.05)
+    parser.add_argument('--time-tolerance', type=float, default=0.25)
+    parser.add_argument('--time-slack', type=float, default=0.005, help='seconds allowed on top of --time-tolerance')
+    parser.add_argument('--warmup', type=int, default=3, help='untimed runs before the measured ones')
+    args = parser.parse_args(argv)
+
+    fixtures = {os.path.basename(path): load_fixture(path) for path in args.fixture}
+    for spec in args.synthetic:
+        year_level, sem_year = spec.split('_')
+        fixtures[f'synthetic_{spec}'] = synthetic_fixture(year_level, sem_year, seed=args.seed)
+    if not fixtures:
+        parser.error('pass at least one --fixture or --synthetic')
+
+    results = {name: run_fixture(payload, args.runs, args.seed, args.warmup) for name, payload in fixtures.items()}
+    print_report(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        regressions = find_regressions(results, load_fixture(args.baseline), args.score_tolerance,
+                                       args.time_tolerance, args.time_slack)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from scheduler import select_sections
+
+
+def _normalized(values):
+    return sorted({str(value).strip() for value in values or [] if str(value).strip()})
+
+
+def section_digest(sections):
+    encoded = json.dumps(sections, sort_keys=True, separators=(',', ':')).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def canonical_profile(sections, digest, year_level, sem_year, available_days, back_subjects):
+    # Key one student's profile against a section slice hashed once up front
+    inputs = {
+        'sections': sections,
+        'year_level': str(year_level),
+        'sem_year': str(sem_year),
+        'available_days': _normalized(available_days),
+        'back_subjects': _normalized(back_subjects),
+    }
+    encoded = json.dumps(dict(inputs, sections=digest), sort_keys=True, separators=(',', ':')).encode()
+    return hashlib.sha256(encoded).hexdigest(), inputs
+
+
+def canonical_request(user_data, year_level, sem_year, available_days, back_subjects):
+    """Normalize /api/user inputs and hash them into a cache key.
+
+    Only the {year}_{sem} section slice the solver reads is hashed, and days
+    and back subjects are order- and duplicate-insensitive, so students in
+    the same block with the same profile share one entry.
+    """
+    sections = select_sections(user_data, year_level, sem_year)
+    return canonical_profile(sections, section_digest(sections), year_level, sem_year, available_days, back_subjects)
+
+
+def seed_for(key):
+    return int(key[:16], 16)
+
+
+class ResultCache:
+    """Thread-safe LRU cache whose entries also expire after ttl seconds."""
+
+    def __init__(self, max_entries=256, ttl=600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        # Call when section data changes upstream
+        with self._lock:
+            cleared = len(self._entries)
+            self._entries.clear()
+            return cleared
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'maxEntries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+result_cache = ResultCache(
+    max_entries=int(os.environ.get('RESULT_CACHE_SIZE', 256)),
+    ttl=float(os.environ.get('RESULT_CACHE_TTL', 600)),
+)
@@ -0,0 +1,91 @@
+import json
+import os
+from collections import namedtuple
+from types import MappingProxyType
+
+CURRICULUM_FILE = os.environ.get(
+    'CURRICULUM_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'curriculum.json'))
+
+year_names = ['First', 'Second', 'Third', 'Fourth']
+# Curriculum keys read First_Year_First_Sem, ..., First_Year_Summer
+sem_names = ['First_Sem', 'Second_Sem', 'Summer']
+
+Offering = namedtuple('Offering', ['semester', 'units', 'prereqs'])
+
+
+def _closure(graph):
+    # Everything reachable from each node; tolerates cycles like ITEL312 -> ITEL312
+    closure = {}
+    for start in graph:
+        seen = set()
+        stack = list(graph[start])
+        while stack:
+            node = stack.pop()
+            if node not in seen:
+                seen.add(node)
+                stack.extend(graph.get(node, ()))
+        closure[start] = frozenset(seen)
+    return MappingProxyType(closure)
+
+
+class Catalog:
+    """Read-only curriculum compiled once from {semester: {subject: {units, prereq}}}.
+
+    A subject listed in several semesters keeps one Offering per semester;
+    the subject-level maps (prereqs, dependents, closures) take the union.
+    """
+
+    def __init__(self, curriculum):
+        semesters = {}
+        offerings = {}
+        prereqs = {}
+        for semester, semester_subjects in curriculum.items():
+            semesters[semester] = MappingProxyType({
+                subject: Offering(semester, details.get('units', 0), frozenset(details.get('prereq', [])))
+                for subject, details in semester_subjects.items()
+            })
+            for subject, offering in semesters[semester].items():
+                offerings.setdefault(subject, []).append(offering)
+                prereqs[subject] = prereqs.get(subject, frozenset()) | offering.prereqs
+
+        dependents = {subject: set() for subject in prereqs}
+        for subject, subject_prereqs in prereqs.items():
+            for prereq in subject_prereqs:
+                dependents.setdefault(prereq, set()).add(subject)
+
+        self.semesters = MappingProxyType(semesters)
+        self.offerings = MappingProxyType({subject: tuple(o) for subject, o in offerings.items()})
+        self.semester_of = MappingProxyType({subject: tuple(o.semester for o in offered) for subject, offered in offerings.items()})
+        self.units = MappingProxyType({subject: offered[0].units for subject, offered in offerings.items()})
+        self.prereqs = MappingProxyType(prereqs)
+        self.dependents = MappingProxyType({subject: frozenset(d) for subject, d in dependents.items()})
+        # Transitive closures: everything a subject needs, and everything that needs it
+        self.ancestors = _closure(self.prereqs)
+        self.descendants = _closure(self.dependents)
+        # Prerequisites of a subject and of every subject downstream of it
+        self.downstream_prereqs = MappingProxyType({
+            subject: frozenset().union(*(self.prereqs.get(s, ()) for s in self.descendants[subject] | {subject}))
+            for subject in self.dependents
+        })
+
+    @staticmethod
+    def semester_key(year_level, sem_year):
+        return f'{year_names[int(year_level) - 1]}_Year_{sem_names[int(sem_year) - 1]}'
+
+    def required_subjects(self, year_level, sem_year, back_subjects):
+        # Drop subjects whose direct prerequisite is still a back subject
+        back_subjects = frozenset(back_subjects)
+        semester = self.semesters.get(self.semester_key(year_level, sem_year), {})
+        return [subject for subject, offering in semester.items() if offering.prereqs.isdisjoint(back_subjects)]
+
+    def prerequisites_satisfied(self, subject, taken):
+        # The subject and everything that depends on it can be taken given `taken`
+        return self.downstream_prereqs.get(subject, frozenset()) <= frozenset(taken)
+
+
+def load_catalog(path=CURRICULUM_FILE):
+    with open(path) as f:
+        return Catalog(json.load(f))
+
+
+catalog = load_catalog()
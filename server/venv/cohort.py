@@ -0,0 +1,174 @@
+import os
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import metrics
+from cache import canonical_profile, section_digest, seed_for
+from metrics import phase
+from model import CompactSections
+from scheduler import ScheduleEvaluator, required_subjects_for, solve_hybrid, solve_request
+
+COHORT_CHUNK_SIZE = int(os.environ.get('COHORT_CHUNK_SIZE', 4))
+
+# Parsed section tables by (section digest, subjects), kept per worker process
+# so every chunk of a batch that lands on the same worker reuses them
+_compact_tables = OrderedDict()
+_COMPACT_TABLES = 32
+
+
+def compact_table(sections, digest, subjects):
+    key = (digest, tuple(subjects))
+    compact = _compact_tables.get(key)
+    if compact is None:
+        compact = _compact_tables[key] = CompactSections(sections, subjects)
+        if len(_compact_tables) > _COMPACT_TABLES:
+            _compact_tables.popitem(last=False)
+    else:
+        _compact_tables.move_to_end(key)
+    return compact
+
+
+def solve_profiles(sections, digest, year_level, sem_year, profiles, hybrid_only=False):
+    # Worker entry point: solve several distinct profiles against one section
+    # slice, returning each result with its own report
+    solve = solve_hybrid if hybrid_only else solve_request
+    results = []
+    for available_days, back_subjects, seed in profiles:
+        with metrics.reporting() as report, metrics.sampled_profile('cohort_profile'):
+            with phase('catalog'):
+                required_subjects = required_subjects_for(year_level, sem_year, back_subjects)
+            with phase('index'):
+                compact = compact_table(sections, digest, required_subjects)
+                evaluator = ScheduleEvaluator(sections, available_days, back_subjects, required_subjects, compact)
+            result = solve(sections, year_level, sem_year, available_days, back_subjects, seed, evaluator)
+        results.append((result, report.to_dict()))
+    return results
+
+
+class SeatLedger:
+    """Seats taken in each (section, subject) offering across a batch.
+
+    capacity is either one seat count for every offering or a
+    {section: seats} mapping; sections missing from the mapping are unlimited.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.taken = {}
+
+    def limit(self, section):
+        if isinstance(self.capacity, dict):
+            return self.capacity.get(section)
+        return self.capacity
+
+    def is_full(self, section, subject):
+        limit = self.limit(section)
+        return limit is not None and self.taken.get((section, subject), 0) >= limit
+
+    def reserve(self, schedule):
+        # All or nothing: a schedule naming any full offering takes no seats
+        offerings = [(entry['section'], subject) for subject, entry in schedule.items()]
+        if any(self.is_full(*offering) for offering in offerings):
+            return False
+        for offering in offerings:
+            self.taken[offering] = self.taken.get(offering, 0) + 1
+        return True
+
+    def restrict(self, sections):
+        return {
+            name: {subject: text for subject, text in offered.items() if not self.is_full(name, subject)}
+            for name, offered in sections.items()
+        }
+
+
+def stream_cohort(submit, sections, year_level, sem_year, students, capacity=None, cache=None,
+                  chunk_size=COHORT_CHUNK_SIZE, window=1):
+    """Solve a batch of (available_days, back_subjects) profiles, yielding
+    each student's result as soon as it is ready.
+
+    Students with identical normalized profiles are solved once, cached
+    results are yielded first, and the remaining profiles are submitted in
+    chunks through submit(fn, *args) so each worker parses the section slice
+    once per chunk. At most `window` chunks are submitted at a time, so a
+    large batch doesn't queue ahead of other work on the same pool. Every
+    result carries the student's index in `students`.
+
+    With a capacity, students take seats for their hybrid schedule in the
+    order results arrive. A student whose schedule names an offering that has
+    filled up in the meantime is solved again without the full offerings.
+    Only the hybrid schedule is seat-checked, so results then carry just
+    hybridSchedule and hybridScore and the PSO half isn't run.
+    """
+    seats = SeatLedger(capacity) if capacity is not None else None
+    hybrid_only = seats is not None
+    ready = deque()
+    queued = deque()
+    pending = {}
+
+    def dispatch(indices):
+        table = seats.restrict(sections) if seats is not None else sections
+        digest = section_digest(table)
+        groups = {}
+        for i in indices:
+            key, inputs = canonical_profile(table, digest, year_level, sem_year, *students[i])
+            groups.setdefault(key, (inputs, []))[1].append(i)
+
+        misses = []
+        for key, (inputs, members) in groups.items():
+            result = cache.get(key) if cache is not None else None
+            if result is None:
+                misses.append((key, inputs, members))
+            else:
+                ready.append((result, members))
+        # Profiles sharing back subjects share a required-subject list, so
+        # keeping them in the same chunk lets the worker reuse their table
+        misses.sort(key=lambda miss: miss[1]['back_subjects'])
+        for start in range(0, len(misses), chunk_size):
+            chunk = misses[start:start + chunk_size]
+            profiles = [(inputs['available_days'], inputs['back_subjects'], seed_for(key)) for key, inputs, _ in chunk]
+            queued.append((chunk, (table, digest, str(year_level), str(sem_year), profiles, hybrid_only)))
+
+    def fill():
+        while queued and len(pending) < window:
+            chunk, args = queued.popleft()
+            pending[submit(solve_profiles, *args)] = chunk
+
+    dispatch(range(len(students)))
+    try:
+        while ready or queued or pending:
+            while ready:
+                result, members = ready.popleft()
+                blocked = []
+                for i in members:
+                    if seats is None:
+                        yield dict(result, student=i)
+                    elif seats.reserve(result['hybridSchedule']):
+                        yield {'hybridSchedule': result['hybridSchedule'], 'hybridScore': result['hybridScore'], 'student': i}
+                    else:
+                        blocked.append(i)
+                if blocked:
+                    dispatch(blocked)
+            fill()
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk = pending.pop(future)
+                try:
+                    results = future.result()
+                except Exception as e:
+                    for _, _, members in chunk:
+                        for i in members:
+                            yield {'student': i, 'status': 'error', 'message': str(e)}
+                    continue
+                for (key, _, members), (result, report) in zip(chunk, results):
+                    metrics.observe(report)
+                    # Hybrid-only results would be incomplete /api/user answers
+                    if cache is not None and not hybrid_only:
+                        cache.put(key, result)
+                    ready.append((result, members))
+    finally:
+        # The client went away or the batch failed; drop chunks not yet started
+        queued.clear()
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,55 @@
+import random
+from array import array
+import numpy as np
+
+
+class AntColony:
+    """Ant colony whose pheromone and best schedule persist between runs.
+
+    Subjects are picked by roulette over cached pheromone row sums, and each
+    ant's schedule is deposited as one outer-product update.
+    """
+
+    def __init__(self, evaluator, num_ants=2, evaporation=0.95, rng=random):
+        self.evaluator = evaluator
+        self.rng = rng
+        self.num_subjects = len(evaluator.subjects)
+        self.num_ants = num_ants
+        self.evaporation = evaporation
+        self.pheromone = np.ones((self.num_subjects, self.num_subjects))
+        self.row_sums = self.pheromone.sum(axis=1).tolist()
+        self.best_schedule = evaluator.compact.empty_schedule()
+        self.best_score = float('-inf')
+        self.evaluations = 0
+
+    def construct(self):
+        state = self.evaluator.new_schedule()
+        remaining = list(range(self.num_subjects))
+        while remaining:
+            pick = self.rng.choices(range(len(remaining)), weights=[self.row_sums[i] for i in remaining])[0]
+            state.place_best(remaining.pop(pick))
+        self.evaluations += 1
+        return state
+
+    def deposit(self, schedule, score):
+        visited = (np.asarray(schedule) >= 0).astype(float)
+        self.pheromone += np.outer(visited, visited) * (1 / (1 + self.best_score - score))
+        self.row_sums = self.pheromone.sum(axis=1).tolist()
+
+    def iterate(self):
+        for _ in range(self.num_ants):
+            state = self.construct()
+            score = state.score
+            if score > self.best_score:
+                self.best_score = score
+                self.best_schedule = array('i', state.sections)
+            self.deposit(state.sections, score)
+
+        # Evaporate pheromone
+        self.pheromone *= self.evaporation
+        self.row_sums = self.pheromone.sum(axis=1).tolist()
+
+    def run(self, num_iterations):
+        for _ in range(num_iterations):
+            self.iterate()
+        return self.best_schedule, self.best_score
@@ -0,0 +1,203 @@
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import metrics
+from scheduler import solvers
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, key):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = 'queued'
+        self.created = time.monotonic()
+        self.finished = None
+        self.futures = []
+        self.parts_done = 0
+        self.result = {}
+        self.reports = []
+        self.error = None
+
+    def to_dict(self):
+        job = {
+            'jobId': self.id,
+            'status': self.status,
+            'progress': self.parts_done / len(solvers),
+        }
+        if self.status == 'done':
+            job['result'] = self.result
+        if self.error:
+            job['error'] = self.error
+        return job
+
+
+class JobQueue:
+    """Runs the hybrid and PSO halves of each request on a process pool.
+
+    At most max_pending jobs may be queued or running; submit() raises
+    QueueFull beyond that. Finished jobs are kept for `retention` seconds,
+    and at most `max_finished` of them at once, oldest dropped first.
+    Other work such as cohort chunks runs on the same pool through
+    submit_task() and counts as pending while it is in flight.
+    """
+
+    def __init__(self, max_workers=None, max_pending=32, retention=600, max_finished=1000, cache=None, executor=None):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retention = retention
+        self.max_finished = max_finished
+        self.cache = cache
+        # An executor passed in is used instead of the lazily created process pool
+        self._executor = executor
+        self._jobs = {}
+        self._tasks = set()
+        # Re-entrant: a future that is already done runs its callback inside submit()
+        self._lock = threading.RLock()
+
+    @property
+    def workers(self):
+        return self.max_workers or os.cpu_count() or 1
+
+    def _submit(self, fn, *args):
+        # Runs fn on the shared worker pool. The pool is created on first use
+        # so importing the server doesn't start workers, and replaced if a
+        # dead worker broke it. Workers are spawned rather than forked: this
+        # runs on a request thread, and a forked child can inherit locks
+        # (logging's, for one) that another thread was holding
+        with self._lock:
+            if self._executor is not None:
+                try:
+                    return self._executor.submit(fn, *args)
+                except BrokenProcessPool:
+                    self._executor.shutdown(wait=False)
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+            return self._executor.submit(fn, *args)
+
+    def _prune(self):
+        # Cached submits finish at once without taking a pending slot, so a
+        # burst of them is bounded by max_finished rather than the retention
+        now = time.monotonic()
+        finished = sorted((job for job in self._jobs.values()
+                           if job.finished is not None and all(f.done() for f in job.futures)),
+                          key=lambda job: job.finished)
+        excess = len(finished) - self.max_finished + 1
+        for n, job in enumerate(finished):
+            if n < excess or now - job.finished > self.retention:
+                del self._jobs[job.id]
+
+    def pending(self):
+        # A cancelled or failed job keeps its slot until its halves that had
+        # already started have finished in their workers
+        with self._lock:
+            jobs = sum(job.status in ('queued', 'running') or not all(f.done() for f in job.futures)
+                       for job in self._jobs.values())
+            return jobs + len(self._tasks)
+
+    def check_capacity(self):
+        if self.pending() >= self.max_pending:
+            raise QueueFull(f'{self.max_pending} jobs already pending')
+
+    def submit_task(self, fn, *args):
+        # A pool task outside any job; it holds a pending slot until it finishes
+        with self._lock:
+            future = self._submit(fn, *args)
+            self._tasks.add(future)
+        future.add_done_callback(self._task_done)
+        return future
+
+    def _task_done(self, future):
+        with self._lock:
+            self._tasks.discard(future)
+
+    def submit(self, key, inputs, seed, report=None):
+        # report holds the request's own phases so far; the solver halves'
+        # reports are added to it and observed once the job is done
+        cached = self.cache.get(key) if self.cache is not None else None
+        with self._lock:
+            self._prune()
+            job = Job(key)
+            if report is not None:
+                job.reports.append(report.to_dict())
+            if cached is not None:
+                job.status, job.result, job.parts_done = 'done', cached, len(solvers)
+                job.finished = time.monotonic()
+                self._jobs[job.id] = job
+                metrics.observe(metrics.combine(job.reports))
+                return job
+            self.check_capacity()
+            self._jobs[job.id] = job
+            for solve in solvers:
+                future = self._submit(metrics.run_reported, solve, dict(inputs, seed=seed))
+                future.add_done_callback(lambda future, job=job: self._part_done(job, future))
+                job.futures.append(future)
+        return job
+
+    def _part_done(self, job, future):
+        with self._lock:
+            if job.status not in ('queued', 'running'):
+                return
+            if future.cancelled():
+                return
+            error = future.exception()
+            if error is not None:
+                job.status, job.error = 'failed', str(error)
+                job.finished = time.monotonic()
+                for other in job.futures:
+                    other.cancel()
+                return
+            result, report = future.result()
+            job.result.update(result)
+            job.reports.append(report)
+            job.parts_done += 1
+            job.status = 'running'
+            if job.parts_done == len(solvers):
+                job.status = 'done'
+                job.finished = time.monotonic()
+                metrics.observe(metrics.combine(job.reports))
+                if self.cache is not None:
+                    self.cache.put(job.key, job.result)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.status == 'queued' and any(f.running() for f in job.futures):
+                job.status = 'running'
+            return job
+
+    def cancel(self, job_id):
+        # Queued halves are dropped; a half already running in a worker
+        # finishes there but its result is discarded
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.status in ('queued', 'running'):
+                for future in job.futures:
+                    future.cancel()
+                job.status = 'cancelled'
+                job.finished = time.monotonic()
+            return job
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def create_job_queue(cache=None):
+    return JobQueue(
+        max_workers=int(os.environ['JOB_WORKERS']) if os.environ.get('JOB_WORKERS') else None,
+        max_pending=int(os.environ.get('JOB_QUEUE_DEPTH', 32)),
+        retention=float(os.environ.get('JOB_RETENTION', 600)),
+        max_finished=int(os.environ.get('JOB_MAX_FINISHED', 1000)),
+        cache=cache,
+    )
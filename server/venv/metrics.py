@@ -0,0 +1,198 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+PHASES = ['parse', 'catalog', 'index', 'pso', 'aco', 'hybrid_merge', 'serialize']
+TIME_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 10, 100, 1000, 10000, 100000, 1000000)
+
+
+class WorkCounters(threading.local):
+    """Optimizer work done on the current thread, bumped from the hot loops."""
+
+    kinds = ['fitness_evals', 'delta_evals', 'swarm_evals', 'colony_evals', 'section_scans', 'deepcopies']
+
+    def __init__(self):
+        for kind in self.kinds:
+            setattr(self, kind, 0)
+
+    def snapshot(self):
+        return {kind: getattr(self, kind) for kind in self.kinds}
+
+
+work = WorkCounters()
+
+
+class Histogram:
+    def __init__(self, name, help, label, buckets):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value, value):
+        with self._lock:
+            series = self._series.setdefault(label_value, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for label_value, (counts, total, count) in sorted(self._series.items()):
+                label = f'{self.label}="{label_value}"'
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {bucket_count}')
+                lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {count}')
+                lines.append(f'{self.name}_sum{{{label}}} {total}')
+                lines.append(f'{self.name}_count{{{label}}} {count}')
+        return lines
+
+
+phase_seconds = Histogram('scheduler_phase_seconds', 'Time spent in each request phase.', 'phase', TIME_BUCKETS)
+work_per_request = Histogram('scheduler_work_per_request', 'Optimizer work done per request.', 'kind', COUNT_BUCKETS)
+_gauges = []
+
+
+def register_gauge(name, help, read, kind='gauge'):
+    _gauges.append((name, help, read, kind))
+
+
+def render():
+    lines = phase_seconds.render() + work_per_request.render()
+    for name, help, read, kind in _gauges:
+        lines += [f'# HELP {name} {help}', f'# TYPE {name} {kind}', f'{name} {read()}']
+    return '\n'.join(lines) + '\n'
+
+
+class Report:
+    """Phase times and work counts for one request (or one half of a job)."""
+
+    def __init__(self):
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.work = dict.fromkeys(WorkCounters.kinds, 0)
+
+    def to_dict(self):
+        return {'phases': self.phases, 'work': self.work}
+
+
+_local = threading.local()
+
+
+@contextmanager
+def phase(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        report = getattr(_local, 'report', None)
+        if report is not None:
+            report.phases[name] += time.perf_counter() - start
+
+
+@contextmanager
+def reporting():
+    # Collects phase() times and work counters on this thread into a Report
+    report = _local.report = Report()
+    before = work.snapshot()
+    try:
+        yield report
+    finally:
+        for kind, count in work.snapshot().items():
+            report.work[kind] += count - before[kind]
+        _local.report = None
+
+
+def observe(report):
+    # Accepts a Report or its to_dict() form shipped back from a worker process
+    if isinstance(report, Report):
+        report = report.to_dict()
+    for name, seconds in report['phases'].items():
+        if seconds:
+            phase_seconds.observe(name, seconds)
+    for kind, count in report['work'].items():
+        work_per_request.observe(kind, count)
+
+
+def combine(reports):
+    # Sums the to_dict() forms of reports that belong to one request, such as
+    # a job's parse step and its two solver halves
+    total = Report()
+    for report in reports:
+        for name, seconds in report['phases'].items():
+            total.phases[name] += seconds
+        for kind, count in report['work'].items():
+            total.work[kind] += count
+    return total
+
+
+def run_reported(solve, kwargs):
+    # Job worker entry point: returns the result with its report
+    with reporting() as report, sampled_profile(solve.__name__):
+        result = solve(**kwargs)
+    return result, report.to_dict()
+
+
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_DIR = os.environ.get('PROFILE_DIR')
+
+
+# cProfile hooks the whole interpreter (sys.monitoring on 3.12), so only one
+# profile can run at a time and it sees every thread
+_profile_lock = threading.Lock()
+
+
+@contextmanager
+def sampled_profile(label):
+    """Profile a PROFILE_SAMPLE_RATE fraction of requests with cProfile.
+
+    Profiles are dumped to PROFILE_DIR when set, otherwise the top functions
+    by cumulative time are logged. A request sampled while another profile
+    is running goes unprofiled, and profiler errors are only logged.
+    """
+    if not PROFILE_SAMPLE_RATE or random.random() >= PROFILE_SAMPLE_RATE:
+        yield
+        return
+    if not _profile_lock.acquire(blocking=False):
+        yield
+        return
+    try:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            logger.warning("Skipping profile for %s: another profiler is active", label)
+            profiler = None
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                _report_profile(profiler, label)
+    finally:
+        _profile_lock.release()
+
+
+def _report_profile(profiler, label):
+    try:
+        if PROFILE_DIR:
+            profiler.dump_stats(os.path.join(PROFILE_DIR, f'{label}-{int(time.time() * 1000)}.prof'))
+        else:
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(15)
+            logger.info("Profile for %s:\n%s", label, out.getvalue())
+    except Exception:
+        logger.warning("Could not write profile for %s", label, exc_info=True)
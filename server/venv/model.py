@@ -0,0 +1,104 @@
+import re
+from array import array
+
+SLOT_MINUTES = 15
+DAY_SLOTS = 24 * 60 // SLOT_MINUTES
+
+# Subtracted from fitness for each pair of scheduled subjects whose times overlap
+CONFLICT_PENALTY = 10
+
+_CLOCK = re.compile(r'(\d{1,2}):(\d{2})\s*([AaPp])?')
+
+
+def _minutes(hour, minute, meridiem):
+    hour, minute = int(hour), int(minute)
+    if meridiem:
+        hour = hour % 12 + (12 if meridiem.lower() == 'p' else 0)
+    elif hour < 7:
+        hour += 12  # Classes start at 7:00, so an unmarked 1:00 is in the afternoon
+    return hour * 60 + minute
+
+
+def parse_offering(schedule_str):
+    """Split 'Mon | 8:00-9:30' into ('Mon', (480, 570)).
+
+    The time range is None when the text after the day has no two clock times.
+    """
+    parts = schedule_str.split('|')
+    day = parts[0].strip()
+    clocks = _CLOCK.findall(parts[1]) if len(parts) > 1 else []
+    if len(clocks) < 2:
+        return day, None
+    start, end = _minutes(*clocks[0]), _minutes(*clocks[1])
+    if end <= start:
+        end += 12 * 60
+    return day, (start, end)
+
+
+def slot_mask(day_index, time_range):
+    # Bit i of the week is the i-th SLOT_MINUTES slot; unknown times occupy nothing
+    if time_range is None:
+        return 0
+    start, end = time_range
+    first = start // SLOT_MINUTES
+    last = min(-(-end // SLOT_MINUTES), DAY_SLOTS)
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << (day_index * DAY_SLOTS + first)
+
+
+def count_conflicts(masks):
+    # Pairs of offerings whose slots overlap
+    return sum(1 for i, mask in enumerate(masks) if mask for other in masks[i + 1:] if mask & other)
+
+
+class CompactSections:
+    """One request's section table with subjects, sections and days interned.
+
+    Subject s is required_subjects[s] and section j is the j-th section key.
+    Each offering is parsed once: day_of[s][j] is its day index (-1 when
+    section j does not offer subject s) and mask_of[s][j] its week-slot
+    bitmask. A schedule is an array('i') holding a section index per subject,
+    -1 for unscheduled subjects.
+    """
+
+    def __init__(self, sections, subjects):
+        self.subjects = list(subjects)
+        self.sections = list(sections)
+        self.days = []
+        day_index = {}
+
+        self.candidates = []
+        self.day_of = []
+        self.mask_of = []
+        self.text_of = []
+        for subject in self.subjects:
+            offered = array('i')
+            days = array('i', [-1]) * len(self.sections)
+            masks = [0] * len(self.sections)
+            texts = [None] * len(self.sections)
+            for j, name in enumerate(self.sections):
+                if subject not in sections[name]:
+                    continue
+                texts[j] = sections[name][subject]
+                day, time_range = parse_offering(texts[j])
+                if day not in day_index:
+                    day_index[day] = len(self.days)
+                    self.days.append(day)
+                offered.append(j)
+                days[j] = day_index[day]
+                masks[j] = slot_mask(day_index[day], time_range)
+            self.candidates.append(offered)
+            self.day_of.append(days)
+            self.mask_of.append(masks)
+            self.text_of.append(texts)
+
+    def empty_schedule(self):
+        return array('i', [-1]) * len(self.subjects)
+
+    def to_json(self, schedule):
+        # Response boundary: back to {subject: {'schedule': ..., 'section': ...}}
+        return {
+            self.subjects[s]: {'schedule': self.text_of[s][j], 'section': self.sections[j]}
+            for s, j in enumerate(schedule) if j >= 0
+        }
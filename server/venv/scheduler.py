@@ -0,0 +1,388 @@
+import random, copy
+from array import array
+import numpy as np
+from swarm import SwarmEncoding, VectorSwarm
+from colony import AntColony
+from catalog import catalog
+from metrics import phase, work
+from model import CONFLICT_PENALTY, CompactSections, parse_offering, slot_mask, count_conflicts
+
+
+def select_sections(user_data, year_level, sem_year):
+    return {k: v for k, v in user_data.items() if k.startswith(f"{year_level}_{sem_year}")}
+
+
+def required_subjects_for(year_level, sem_year, back_subjects):
+    return catalog.required_subjects(year_level, sem_year, back_subjects)
+
+
+def parse_schedule(schedule_str):
+    parts = schedule_str.split('|')
+    if len(parts) >= 1:
+        return parts[0].strip()
+    else:
+        return ""
+
+
+class Particle:
+    def __init__(self, dimensions, rng=random):
+        self.position = [rng.random() for _ in range(dimensions)]
+        self.velocity = [rng.uniform(-1, 1) for _ in range(dimensions)]
+        self.best_position = copy.deepcopy(self.position)
+        work.deepcopies += 1
+        self.best_score = float('-inf')
+
+
+def fitness(schedule, available_days, back_subjects, required_subjects):
+    work.fitness_evals += 1
+    score = 0
+    scheduled_subjects = set()
+    days_used = {day: False for day in available_days}
+
+    for subject, subject_data in schedule.items():
+        day = parse_schedule(subject_data['schedule'])
+        if day in available_days:
+            score += 1  # Reward for scheduling a subject
+            days_used[day] = True
+            if subject in back_subjects:
+                score += 2  # Extra reward for back subjects
+            if subject in required_subjects:
+                score += 5  # Increased reward for required subjects
+            scheduled_subjects.add(subject)
+        else:
+            score -= 2  # Penalty for scheduling on unavailable day
+
+    # Reward for using all available days
+    score += sum(days_used.values()) * 3
+
+    # Heavy penalty for missing required subjects
+    missing_subjects = set(required_subjects) - scheduled_subjects
+    score -= len(missing_subjects) * 10
+
+    # Heavy penalty for each pair of subjects whose class times overlap
+    day_index = {}
+    masks = []
+    for subject_data in schedule.values():
+        day, time_range = parse_offering(subject_data['schedule'])
+        masks.append(slot_mask(day_index.setdefault(day, len(day_index)), time_range))
+    score -= count_conflicts(masks) * CONFLICT_PENALTY
+
+    return score
+
+
+class ScheduleEvaluator:
+    """Shared per-request scoring context for the optimizers.
+
+    Wraps the interned CompactSections table with per-subject gains and
+    available-day flags, and hands out IncrementalSchedule objects that score
+    proposed assignments as deltas. Scores always match fitness(). A
+    CompactSections table already built for these sections and subjects can
+    be passed in to skip parsing them again.
+    """
+
+    def __init__(self, sections, available_days, back_subjects, required_subjects, compact=None):
+        self.compact = compact if compact is not None else CompactSections(sections, required_subjects)
+        self.subjects = self.compact.subjects
+        available_days = set(available_days)
+        back_subjects = set(back_subjects)
+        required = set(required_subjects)
+        # Indexed by interned day / subject
+        self.available = [day in available_days for day in self.compact.days]
+        self.required = [subject in required for subject in self.subjects]
+        # Score of a subject placed on an available day, before day/missing bonuses
+        self.gain = [1 + 2 * (subject in back_subjects) + 5 * (subject in required) for subject in self.subjects]
+        self.num_required = len(required)
+
+        # Precomputed section choices per subject: (section, day, slot mask,
+        # score of adding it before day-usage and conflict terms)
+        compact = self.compact
+        self.choices = [
+            [(j, compact.day_of[s][j], compact.mask_of[s][j],
+              self.gain[s] + 10 * self.required[s] if self.available[compact.day_of[s][j]] else -2)
+             for j in compact.candidates[s]]
+            for s in range(len(self.subjects))
+        ]
+
+    def item_value(self, s, day):
+        return self.gain[s] if self.available[day] else -2
+
+    def new_schedule(self):
+        return IncrementalSchedule(self)
+
+    def score_vector(self, sections):
+        state = self.new_schedule()
+        for s, j in enumerate(sections):
+            if j >= 0:
+                state.assign(s, j)
+        return state.score
+
+
+class IncrementalSchedule:
+    """A schedule vector under construction with its fitness() score kept up to date."""
+
+    def __init__(self, evaluator):
+        self.evaluator = evaluator
+        self.sections = evaluator.compact.empty_schedule()
+        self.days = array('i', [-1]) * len(evaluator.subjects)
+        self.masks = [0] * len(evaluator.subjects)
+        self.busy = 0
+        self.day_counts = [0] * len(evaluator.compact.days)
+        self.days_used = 0
+        self.item_score = 0
+        self.required_scheduled = 0
+        self.conflicts = 0
+
+    @property
+    def score(self):
+        missing = self.evaluator.num_required - self.required_scheduled
+        return self.item_score + self.days_used * 3 - missing * 10 - self.conflicts * CONFLICT_PENALTY
+
+    @property
+    def schedule(self):
+        return self.evaluator.compact.to_json(self.sections)
+
+    def overlaps(self, s, mask):
+        # Other scheduled subjects whose slots overlap mask
+        if not mask & self.busy:
+            return 0
+        return sum(1 for other, other_mask in enumerate(self.masks) if other != s and other_mask & mask)
+
+    def delta(self, s, j):
+        evaluator = self.evaluator
+        day = evaluator.compact.day_of[s][j]
+        change = 0
+        freed_day = -1
+        if self.sections[s] >= 0:
+            old_day = self.days[s]
+            change -= evaluator.item_value(s, old_day)
+            if evaluator.available[old_day]:
+                if self.day_counts[old_day] == 1:
+                    change -= 3
+                    freed_day = old_day
+                if evaluator.required[s]:
+                    change -= 10
+            change += self.overlaps(s, self.masks[s]) * CONFLICT_PENALTY
+        change += evaluator.item_value(s, day)
+        if evaluator.available[day]:
+            if not self.day_counts[day] or day == freed_day:
+                change += 3
+            if evaluator.required[s]:
+                change += 10
+        change -= self.overlaps(s, evaluator.compact.mask_of[s][j]) * CONFLICT_PENALTY
+        work.delta_evals += 1
+        return change
+
+    def assign(self, s, j):
+        evaluator = self.evaluator
+        if self.sections[s] >= 0:
+            old_day = self.days[s]
+            self.item_score -= evaluator.item_value(s, old_day)
+            if evaluator.available[old_day]:
+                self.day_counts[old_day] -= 1
+                if not self.day_counts[old_day]:
+                    self.days_used -= 1
+                if evaluator.required[s]:
+                    self.required_scheduled -= 1
+            self.conflicts -= self.overlaps(s, self.masks[s])
+            self.masks[s] = 0
+            self.busy = 0
+            for mask in self.masks:
+                self.busy |= mask
+        day = evaluator.compact.day_of[s][j]
+        mask = evaluator.compact.mask_of[s][j]
+        self.item_score += evaluator.item_value(s, day)
+        if evaluator.available[day]:
+            if not self.day_counts[day]:
+                self.days_used += 1
+            self.day_counts[day] += 1
+            if evaluator.required[s]:
+                self.required_scheduled += 1
+        self.conflicts += self.overlaps(s, mask)
+        self.masks[s] = mask
+        self.busy |= mask
+        self.days[s] = day
+        self.sections[s] = j
+
+    def best_candidate(self, s):
+        work.section_scans += 1
+        best = -1
+        best_delta = float('-inf')
+        if self.sections[s] >= 0:
+            for j in self.evaluator.compact.candidates[s]:
+                change = self.delta(s, j)
+                if change > best_delta:
+                    best_delta = change
+                    best = j
+            return best
+
+        # Adding a new subject: same as delta() without the removal terms
+        available = self.evaluator.available
+        for j, day, mask, change in self.evaluator.choices[s]:
+            if available[day] and not self.day_counts[day]:
+                change += 3
+            if mask & self.busy:
+                change -= self.overlaps(s, mask) * CONFLICT_PENALTY
+            if change > best_delta:
+                best_delta = change
+                best = j
+        work.delta_evals += len(self.evaluator.choices[s])
+        return best
+
+    def place_best(self, s):
+        j = self.best_candidate(s)
+        if j >= 0:
+            self.assign(s, j)
+        return j
+
+
+def build_schedule(evaluator, position, complete=False):
+    # Decode a particle position: subjects above 0.5 get their best section,
+    # and with complete=True every remaining required subject is filled in
+    state = evaluator.new_schedule()
+    for s in range(len(evaluator.subjects)):
+        if position[s] > 0.5:
+            state.place_best(s)
+    if complete:
+        for s in range(len(evaluator.subjects)):
+            if state.sections[s] < 0:
+                state.place_best(s)
+    return state
+
+
+def update_velocity(particle, global_best_position, w=0.5, c1=1, c2=1, rng=random):
+    for i in range(len(particle.position)):
+        r1, r2 = rng.random(), rng.random()
+        cognitive = c1 * r1 * (particle.best_position[i] - particle.position[i])
+        social = c2 * r2 * (global_best_position[i] - particle.position[i])
+        particle.velocity[i] = w * particle.velocity[i] + cognitive + social
+
+
+def update_position(particle):
+    for i in range(len(particle.position)):
+        particle.position[i] += particle.velocity[i]
+        particle.position[i] = max(0, min(1, particle.position[i]))  # Clamp to [0, 1]
+
+
+def particle_swarm_optimization(sections, available_days, back_subjects, required_subjects, num_particles=200, max_iterations=100, evaluator=None, rng=random):
+    if evaluator is None:
+        evaluator = ScheduleEvaluator(sections, available_days, back_subjects, required_subjects)
+    encoding = SwarmEncoding(evaluator)
+    # Seeded from rng so callers seeding it get repeatable swarms
+    swarm = VectorSwarm(encoding, num_particles, np.random.default_rng(rng.getrandbits(64)))
+    global_best_position, global_best_score = swarm.run(max_iterations)
+    work.swarm_evals += swarm.evaluations
+
+    # Convert the best solution into a schedule, ensuring all required subjects are included
+    state = encoding.to_schedule(encoding.decode(global_best_position[np.newaxis])[0])
+    for s in range(len(required_subjects)):
+        if state.sections[s] < 0:
+            state.place_best(s)
+
+    return state.schedule, state.score
+
+
+def ant_colony_optimization(sections, available_days, back_subjects, required_subjects, num_ants=2, num_iterations=5, evaluator=None, rng=random):
+    if evaluator is None:
+        evaluator = ScheduleEvaluator(sections, available_days, back_subjects, required_subjects)
+    colony = AntColony(evaluator, num_ants, rng=rng)
+    best_schedule, best_score = colony.run(num_iterations)
+    work.colony_evals += colony.evaluations
+    return evaluator.compact.to_json(best_schedule), best_score
+
+
+def pso_aco_hybrid(sections, available_days, back_subjects, required_subjects, num_particles=2, max_iterations=5, evaluator=None, rng=random):
+    if evaluator is None:
+        evaluator = ScheduleEvaluator(sections, available_days, back_subjects, required_subjects)
+    dimensions = len(required_subjects)
+    particles = [Particle(dimensions, rng) for _ in range(num_particles)]
+    colony = AntColony(evaluator, rng=rng)
+    global_best_position = None
+    global_best_score = float('-inf')
+
+    for _ in range(max_iterations):
+        for particle in particles:
+            # Convert particle position to schedule
+            with phase('pso'):
+                schedule = build_schedule(evaluator, particle.position).sections
+
+            # Advance the shared colony one iteration instead of restarting it
+            with phase('aco'):
+                colony.iterate()
+            aco_schedule = colony.best_schedule
+
+            # Merge PSO and ACO results, ACO sections taking precedence
+            with phase('hybrid_merge'):
+                merged_schedule = array('i', (a if a >= 0 else p for p, a in zip(schedule, aco_schedule)))
+                score = evaluator.score_vector(merged_schedule)
+
+            if score > particle.best_score:
+                particle.best_score = score
+                particle.best_position = list(particle.position)
+            if score > global_best_score:
+                global_best_score = score
+                global_best_position = list(particle.position)
+
+        with phase('pso'):
+            for particle in particles:
+                update_velocity(particle, global_best_position, rng=rng)
+                update_position(particle)
+
+    work.colony_evals += colony.evaluations
+    return global_best_position, global_best_score
+
+
+def has_prerequisites_satisfied(subject, current_schedule, back_subjects):
+    # Prerequisites of the subject and of every subject that builds on it
+    return catalog.prerequisites_satisfied(subject, set(current_schedule) | set(back_subjects))
+
+
+def optimize_schedule(sections, available_days, back_subjects, required_subjects, evaluator=None, rng=random):
+    if evaluator is None:
+        evaluator = ScheduleEvaluator(sections, available_days, back_subjects, required_subjects)
+    best_solution, best_score = pso_aco_hybrid(sections, available_days, back_subjects, required_subjects, evaluator=evaluator, rng=rng)
+
+    # Convert the best solution into a schedule, ensuring all required subjects are included
+    return build_schedule(evaluator, best_solution, complete=True).schedule
+
+
+def index_request(sections, year_level, sem_year, available_days, back_subjects):
+    with phase('catalog'):
+        required_subjects = required_subjects_for(year_level, sem_year, back_subjects)
+    with phase('index'):
+        return ScheduleEvaluator(sections, available_days, back_subjects, required_subjects)
+
+
+def solve_hybrid(sections, year_level, sem_year, available_days, back_subjects, seed=None, evaluator=None):
+    rng = random.Random(f'{seed}:hybrid')
+    if evaluator is None:
+        evaluator = index_request(sections, year_level, sem_year, available_days, back_subjects)
+    best_solution, _ = pso_aco_hybrid(sections, available_days, back_subjects, evaluator.subjects, evaluator=evaluator, rng=rng)
+    with phase('hybrid_merge'):
+        state = build_schedule(evaluator, best_solution, complete=True)
+    with phase('serialize'):
+        return {"hybridSchedule": state.schedule, "hybridScore": state.score}
+
+
+def solve_pso(sections, year_level, sem_year, available_days, back_subjects, seed=None, evaluator=None):
+    rng = random.Random(f'{seed}:pso')
+    if evaluator is None:
+        evaluator = index_request(sections, year_level, sem_year, available_days, back_subjects)
+    with phase('pso'):
+        pso_schedule, pso_score = particle_swarm_optimization(sections, available_days, back_subjects, evaluator.subjects, evaluator=evaluator, rng=rng)
+    return {"psoSchedule": pso_schedule, "psoScore": pso_score}
+
+
+# The two halves are seeded independently so job workers can run them in
+# separate processes and still match a synchronous solve
+solvers = [solve_hybrid, solve_pso]
+
+
+def solve_request(sections, year_level, sem_year, available_days, back_subjects, seed=None, evaluator=None):
+    # One hybrid and one PSO solve, shaped like the /api/user response. Both
+    # halves share one index here; job workers build their own per half
+    if evaluator is None:
+        evaluator = index_request(sections, year_level, sem_year, available_days, back_subjects)
+    result = {}
+    for solve in solvers:
+        result.update(solve(sections, year_level, sem_year, available_days, back_subjects, seed, evaluator))
+    return result
@@ -0,0 +1,190 @@
+from flask import Flask, Response, jsonify, request
+from flask_cors import CORS
+import atexit, json, logging, os, random
+import metrics
+from cohort import stream_cohort
+from metrics import phase
+from scheduler import select_sections, solve_request
+from catalog import catalog
+from cache import canonical_request, seed_for, result_cache
+from jobs import QueueFull, create_job_queue
+
+app = Flask(__name__)
+CORS(app, resources={r"/*": {"origins": ["http://localhost:3000", "http://127.0.0.1:3000"]}})
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper())
+
+# Request bodies can carry whole section tables, so only a sample is logged
+PAYLOAD_LOG_SAMPLE_RATE = float(os.environ.get('PAYLOAD_LOG_SAMPLE_RATE', 0.01))
+PAYLOAD_LOG_LIMIT = int(os.environ.get('PAYLOAD_LOG_LIMIT', 500))
+COHORT_MAX_STUDENTS = int(os.environ.get('COHORT_MAX_STUDENTS', 5000))
+
+job_queue = create_job_queue(cache=result_cache)
+atexit.register(job_queue.shutdown)
+
+metrics.register_gauge('scheduler_cache_hits_total', 'Result cache hits.', lambda: result_cache.hits, 'counter')
+metrics.register_gauge('scheduler_cache_misses_total', 'Result cache misses.', lambda: result_cache.misses, 'counter')
+metrics.register_gauge('scheduler_cache_evictions_total', 'Result cache evictions.', lambda: result_cache.evictions, 'counter')
+metrics.register_gauge('scheduler_cache_entries', 'Schedules currently cached.', lambda: result_cache.stats()['entries'])
+metrics.register_gauge('scheduler_jobs_pending', 'Jobs queued or running.', job_queue.pending)
+
+
+def log_payload():
+    if random.random() < PAYLOAD_LOG_SAMPLE_RATE:
+        body = request.get_data(as_text=True)
+        suffix = f"... ({len(body)} chars)" if len(body) > PAYLOAD_LOG_LIMIT else ""
+        app.logger.info(f"Request payload: {body[:PAYLOAD_LOG_LIMIT]}{suffix}")
+
+
+def validate_request(data):
+    if not isinstance(data, dict):
+        raise ValueError("Request body must be a JSON object")
+    user_data = data.get('userData')
+    if not isinstance(user_data, dict) or not user_data:
+        raise ValueError("userData must be a non-empty object")
+    try:
+        year_level, sem_year = int(data.get('yearLevel')), int(data.get('semesterYear'))
+    except (TypeError, ValueError):
+        raise ValueError("yearLevel and semesterYear must be numbers")
+    if not 1 <= year_level <= 4 or not 1 <= sem_year <= 3:
+        raise ValueError("yearLevel must be 1-4 and semesterYear 1-3")
+    if catalog.semester_key(year_level, sem_year) not in catalog.semesters:
+        raise ValueError(f"The curriculum has no semester {sem_year} in year {year_level}")
+    available_days = data.get('availableDay') or []
+    back_subjects = data.get('backSubjects') or []
+    if not isinstance(available_days, list) or not isinstance(back_subjects, list):
+        raise ValueError("availableDay and backSubjects must be lists")
+    return user_data, data.get('yearLevel'), data.get('semesterYear'), available_days, back_subjects
+
+
+def validate_cohort(data):
+    user_data, year_level, sem_year, _, _ = validate_request(data)
+    students = data.get('students')
+    if not isinstance(students, list) or not students:
+        raise ValueError("students must be a non-empty list")
+    if len(students) > COHORT_MAX_STUDENTS:
+        raise ValueError(f"At most {COHORT_MAX_STUDENTS} students per batch")
+    profiles = []
+    for student in students:
+        if not isinstance(student, dict):
+            raise ValueError("Each student must be an object")
+        available_days = student.get('availableDay') or []
+        back_subjects = student.get('backSubjects') or []
+        if not isinstance(available_days, list) or not isinstance(back_subjects, list):
+            raise ValueError("availableDay and backSubjects must be lists")
+        profiles.append((available_days, back_subjects))
+    capacity = data.get('sectionCapacity')
+    seat_counts = capacity.values() if isinstance(capacity, dict) else [capacity]
+    if capacity is not None and not all(isinstance(n, int) and not isinstance(n, bool) and n >= 0 for n in seat_counts):
+        raise ValueError("sectionCapacity must be a seat count or an object of seat counts per section")
+    return user_data, year_level, sem_year, profiles, capacity
+
+
+@app.route("/api/user", methods=['POST'])
+def handle_user():
+    try:
+        with metrics.reporting() as report, metrics.sampled_profile('api_user'):
+            with phase('parse'):
+                data = request.json
+                log_payload()
+                user_data = data.get('userData')
+                if user_data:
+                    # Identical normalized inputs share a seed, so a cached answer is
+                    # the same one a fresh solve would give
+                    key, inputs = canonical_request(user_data, data.get('yearLevel'), data.get('semesterYear'),
+                                                    data.get('availableDay'), data.get('backSubjects'))
+
+            if user_data:
+                result = result_cache.get(key)
+                if result is None:
+                    result = solve_request(**inputs, seed=seed_for(key))
+                    result_cache.put(key, result)
+
+                with phase('serialize'):
+                    response = jsonify({
+                        "message": "Schedules optimized successfully",
+                        **result
+                    })
+        metrics.observe(report)
+        if user_data:
+            return response
+
+    except Exception as e:
+        app.logger.error(f"Error processing request: {str(e)}")
+        return jsonify({"message": f"Server error: {str(e)}", "status": "error"}), 500
+
+@app.route("/api/cache", methods=['GET', 'DELETE'])
+def handle_cache():
+    if request.method == 'DELETE':
+        # Invalidation hook for when section data changes
+        cleared = result_cache.invalidate()
+        return jsonify({"message": f"Cleared {cleared} cached schedules", **result_cache.stats()})
+    return jsonify(result_cache.stats())
+
+@app.route("/api/jobs", methods=['POST'])
+def submit_job():
+    # Only parsing happens here; the job observes this report together with
+    # its solver halves' once it is done
+    with metrics.reporting() as report, metrics.sampled_profile('api_jobs'):
+        with phase('parse'):
+            data = request.get_json(silent=True)
+            log_payload()
+            try:
+                key, inputs = canonical_request(*validate_request(data))
+            except ValueError as e:
+                return jsonify({"message": str(e), "status": "error"}), 400
+    try:
+        job = job_queue.submit(key, inputs, seed_for(key), report)
+    except QueueFull as e:
+        response = jsonify({"message": f"Scheduler busy: {e}", "status": "error"})
+        response.headers['Retry-After'] = '5'
+        return response, 429
+    response = jsonify(job.to_dict())
+    response.headers['Location'] = f"/api/jobs/{job.id}"
+    return response, 202
+
+
+@app.route("/api/jobs/<job_id>", methods=['GET', 'DELETE'])
+def handle_job(job_id):
+    job = job_queue.cancel(job_id) if request.method == 'DELETE' else job_queue.get(job_id)
+    if job is None:
+        return jsonify({"message": "Job not found", "status": "error"}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route("/api/cohort", methods=['POST'])
+def handle_cohort():
+    # One shared section table, many student profiles; results stream back as
+    # NDJSON lines in completion order, each tagged with the student's index.
+    # With sectionCapacity, lines only carry the seat-checked hybrid schedule
+    data = request.get_json(silent=True)
+    try:
+        user_data, year_level, sem_year, profiles, capacity = validate_cohort(data)
+    except ValueError as e:
+        return jsonify({"message": str(e), "status": "error"}), 400
+    try:
+        job_queue.check_capacity()
+    except QueueFull as e:
+        response = jsonify({"message": f"Scheduler busy: {e}", "status": "error"})
+        response.headers['Retry-After'] = '5'
+        return response, 429
+    students = data['students']
+    sections = select_sections(user_data, year_level, sem_year)
+
+    def lines():
+        # Chunks in flight count toward the job queue's pending limit
+        for result in stream_cohort(job_queue.submit_task, sections, year_level, sem_year, profiles,
+                                    capacity=capacity, cache=result_cache, window=job_queue.workers):
+            if 'id' in students[result['student']]:
+                result['id'] = students[result['student']]['id']
+            yield json.dumps(result) + '\n'
+
+    return Response(lines(), mimetype='application/x-ndjson')
+
+
+@app.route("/metrics")
+def handle_metrics():
+    return app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+if __name__ == "__main__":
+    # The debug server's reloader is opt-in; jobs run on the worker pool either way
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1', threaded=True, host='127.0.0.1', port=5000)
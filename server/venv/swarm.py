@@ -0,0 +1,127 @@
+import numpy as np
+
+from model import CONFLICT_PENALTY
+
+
+class SwarmEncoding:
+    """Integer-encoded subject x section x day table for batched scoring.
+
+    Built from a ScheduleEvaluator's interned sections. Candidate k of
+    subject s gets a row holding its score, a one-hot of the available day it
+    uses and the candidates its time slots clash with. Scores computed here
+    match fitness() of the decoded schedule.
+    """
+
+    def __init__(self, evaluator):
+        self.evaluator = evaluator
+        compact = evaluator.compact
+        self.subjects = compact.subjects
+
+        self.width = max(max((len(offered) for offered in compact.candidates), default=0), 1)
+        self.num_candidates = np.array([len(offered) for offered in compact.candidates], dtype=np.int64)
+        self.section_table = np.full((len(self.subjects), self.width), -1, dtype=np.int64)
+
+        # Candidates are flattened to f = s * width + k, plus one last column
+        # for unscheduled subjects that scores nothing and clashes with nothing
+        num_flat = len(self.subjects) * self.width + 1
+        value = np.zeros((num_flat, 1))
+        day_used = np.zeros((num_flat, len(compact.days)))
+        overlap = np.zeros((num_flat, num_flat))
+        masks = [0] * num_flat
+        for s, offered in enumerate(compact.candidates):
+            for k, j in enumerate(offered):
+                f = s * self.width + k
+                day = compact.day_of[s][j]
+                self.section_table[s, k] = j
+                masks[f] = compact.mask_of[s][j]
+                if evaluator.available[day]:
+                    # Scheduling a required subject also cancels its missing penalty
+                    value[f] = evaluator.gain[s] + 10 * evaluator.required[s]
+                    day_used[f, day] = 1
+                else:
+                    value[f] = -2
+        for f, mask in enumerate(masks):
+            if mask:
+                for g in range(f + 1, num_flat):
+                    if masks[g] & mask and g // self.width != f // self.width:
+                        overlap[f, g] = overlap[g, f] = 1
+
+        # One matmul against [value | day_used | overlap] scores a whole swarm
+        self.table = np.hstack([value, day_used, overlap])
+        self.num_days = len(compact.days)
+        self.base_score = -10 * evaluator.num_required
+
+    def decode(self, positions):
+        # A position above 0.5 takes the subject; the rest of the range picks
+        # the section. Returns candidate indices, -1 for subjects left out.
+        offered = self.num_candidates > 0
+        scaled = np.floor((positions - 0.5) * 2 * self.num_candidates).astype(np.int64)
+        choice = np.minimum(scaled, np.maximum(self.num_candidates - 1, 0))
+        return np.where((positions > 0.5) & offered, choice, -1)
+
+    def score(self, choices):
+        num_flat = self.table.shape[0]
+        flat = np.where(choices >= 0, np.arange(len(self.subjects)) * self.width + choices, num_flat - 1)
+        chosen = np.zeros((choices.shape[0], num_flat))
+        chosen[np.arange(choices.shape[0])[:, np.newaxis], flat] = 1
+
+        totals = chosen @ self.table
+        item = totals[:, 0]
+        days_used = (totals[:, 1:1 + self.num_days] > 0).sum(axis=1)
+        # Each clashing pair is counted from both ends
+        conflicts = (totals[:, 1 + self.num_days:] * chosen).sum(axis=1) / 2
+        score = self.base_score + item + days_used * 3 - conflicts * CONFLICT_PENALTY
+        return np.rint(score).astype(np.int64)
+
+    def to_schedule(self, choice):
+        state = self.evaluator.new_schedule()
+        for s, k in enumerate(choice):
+            if k >= 0:
+                state.assign(s, int(self.section_table[s, k]))
+        return state
+
+
+class VectorSwarm:
+    """Particle swarm held as (particles, dimensions) arrays."""
+
+    def __init__(self, encoding, num_particles, rng, w=0.5, c1=1, c2=1, max_velocity=0.5):
+        self.encoding = encoding
+        self.rng = rng
+        self.w, self.c1, self.c2 = w, c1, c2
+        self.max_velocity = max_velocity
+        shape = (num_particles, len(encoding.subjects))
+        self.position = rng.random(shape)
+        self.velocity = rng.uniform(-1, 1, shape)
+        self.best_position = self.position.copy()
+        self.best_score = np.full(num_particles, -np.inf)
+        self.global_best_position = self.position[0].copy()
+        self.global_best_score = float('-inf')
+        self.evaluations = 0
+
+    def evaluate(self):
+        scores = self.encoding.score(self.encoding.decode(self.position))
+        self.evaluations += len(scores)
+        improved = scores > self.best_score
+        self.best_score[improved] = scores[improved]
+        self.best_position[improved] = self.position[improved]
+        leader = int(np.argmax(scores))
+        if scores[leader] > self.global_best_score:
+            self.global_best_score = int(scores[leader])
+            self.global_best_position = self.position[leader].copy()
+        return scores
+
+    def step(self):
+        r1 = self.rng.random(self.position.shape)
+        r2 = self.rng.random(self.position.shape)
+        self.velocity = (self.w * self.velocity
+                         + self.c1 * r1 * (self.best_position - self.position)
+                         + self.c2 * r2 * (self.global_best_position - self.position))
+        np.clip(self.velocity, -self.max_velocity, self.max_velocity, out=self.velocity)
+        self.position += self.velocity
+        np.clip(self.position, 0, 1, out=self.position)  # Clamp to [0, 1]
+
+    def run(self, max_iterations):
+        for _ in range(max_iterations):
+            self.evaluate()
+            self.step()
+        return self.global_best_position, self.global_best_score
@@ -0,0 +1,65 @@
+"""ResultCache LRU/TTL bookkeeping and canonical request keys."""
+import cache
+from cache import ResultCache, canonical_request
+
+USER_DATA = {
+    '2_1_A': {'ITEL211': 'Mon | 8:00-9:30', 'documentName': '2_1_A'},
+    '2_1_B': {'ITEL211': 'Tue | 8:00-9:30', 'documentName': '2_1_B'},
+    '3_1_A': {'ITEL311': 'Wed | 8:00-9:30', 'documentName': '3_1_A'},
+}
+
+
+def test_get_put_counts_hits_and_misses():
+    results = ResultCache()
+    assert results.get('a') is None
+    results.put('a', 1)
+    assert results.get('a') == 1
+    assert results.stats() == {'entries': 1, 'maxEntries': 256, 'ttl': 600, 'hits': 1, 'misses': 1, 'evictions': 0}
+
+
+def test_least_recently_used_entry_is_evicted():
+    results = ResultCache(max_entries=2)
+    results.put('a', 1)
+    results.put('b', 2)
+    results.get('a')
+    results.put('c', 3)
+    assert results.get('b') is None
+    assert results.get('a') == 1 and results.get('c') == 3
+    assert results.stats()['evictions'] == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: now[0])
+    results = ResultCache(ttl=10)
+    results.put('a', 1)
+    now[0] += 9
+    assert results.get('a') == 1
+    now[0] += 2
+    assert results.get('a') is None
+    assert results.stats()['entries'] == 0 and results.stats()['evictions'] == 1
+
+
+def test_invalidate_clears_everything():
+    results = ResultCache()
+    results.put('a', 1)
+    results.put('b', 2)
+    assert results.invalidate() == 2
+    assert results.get('a') is None
+
+
+def test_key_ignores_day_order_duplicates_and_blanks():
+    key, inputs = canonical_request(USER_DATA, 2, 1, ['Wed', 'Mon'], ['ITEL111', ''])
+    same, _ = canonical_request(USER_DATA, '2', '1', [' Mon', 'Wed', 'Mon'], ['ITEL111', 'ITEL111'])
+    assert key == same
+    assert inputs['available_days'] == ['Mon', 'Wed'] and inputs['back_subjects'] == ['ITEL111']
+
+
+def test_key_only_covers_the_requested_section_slice():
+    key, inputs = canonical_request(USER_DATA, 2, 1, ['Mon'], [])
+    other_year = dict(USER_DATA, **{'3_1_B': {'ITEL311': 'Fri | 8:00-9:30'}})
+    assert canonical_request(other_year, 2, 1, ['Mon'], [])[0] == key
+    assert set(inputs['sections']) == {'2_1_A', '2_1_B'}
+    changed = dict(USER_DATA, **{'2_1_B': {'ITEL211': 'Thu | 8:00-9:30'}})
+    assert canonical_request(changed, 2, 1, ['Mon'], [])[0] != key
+    assert canonical_request(USER_DATA, 2, 1, ['Mon', 'Tue'], [])[0] != key
@@ -0,0 +1,12 @@
+"""The curriculum's semester keys line up with yearLevel/semesterYear."""
+from catalog import catalog
+
+
+def test_every_curriculum_semester_has_a_key():
+    keys = {catalog.semester_key(year_level, sem_year) for year_level in range(1, 5) for sem_year in range(1, 4)}
+    assert set(catalog.semesters) <= keys
+
+
+def test_summer_semester_has_subjects():
+    assert catalog.semester_key(1, 3) == 'First_Year_Summer'
+    assert catalog.required_subjects(1, 3, [])
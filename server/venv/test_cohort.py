@@ -0,0 +1,142 @@
+"""Batch cohort streaming: grouping, seat capacity and cancellation.
+
+Chunks run inline through a stub submit(), so these exercise stream_cohort's
+bookkeeping without a process pool.
+"""
+from concurrent.futures import Future
+
+import pytest
+
+from benchmark import synthetic_fixture
+from cache import ResultCache, canonical_profile, section_digest, seed_for
+from cohort import SeatLedger, stream_cohort
+from scheduler import select_sections, solve_request
+
+YEAR_LEVEL, SEM_YEAR = '2', '1'
+DAY_SETS = [['Mon', 'Wed'], ['Tue', 'Thu', 'Sat'], ['Wed', 'Mon'], ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']]
+
+
+@pytest.fixture(scope='module')
+def sections():
+    payload = synthetic_fixture(YEAR_LEVEL, SEM_YEAR, num_sections=3, seed=1)
+    return select_sections(payload['userData'], YEAR_LEVEL, SEM_YEAR)
+
+
+class InlineSubmit:
+    """Runs each chunk when submitted and records what it was given."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, fn, *args):
+        self.calls.append(args)
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def students(count):
+    return [(DAY_SETS[i % len(DAY_SETS)], []) for i in range(count)]
+
+
+def run(sections, batch, **kwargs):
+    submit = InlineSubmit()
+    lines = list(stream_cohort(submit, sections, YEAR_LEVEL, SEM_YEAR, batch, **kwargs))
+    return lines, submit
+
+
+def seat_counts(lines):
+    taken = {}
+    for line in lines:
+        for subject, entry in line['hybridSchedule'].items():
+            taken[(entry['section'], subject)] = taken.get((entry['section'], subject), 0) + 1
+    return taken
+
+
+def test_every_student_gets_one_line_and_identical_profiles_solve_once(sections):
+    batch = students(12)
+    lines, submit = run(sections, batch, chunk_size=2, window=2)
+    assert sorted(line['student'] for line in lines) == list(range(12))
+    # Mon/Wed and Wed/Mon normalize to one profile, leaving three to solve
+    assert sum(len(args[4]) for args in submit.calls) == 3
+    for line in lines:
+        assert line['psoSchedule'] is not None and 'hybridScore' in line
+
+
+def test_results_match_a_single_solve_and_are_cached(sections):
+    cache = ResultCache()
+    batch = students(4)
+    lines, _ = run(sections, batch, cache=cache)
+    for line in lines:
+        key, inputs = canonical_profile(sections, section_digest(sections), YEAR_LEVEL, SEM_YEAR, *batch[line['student']])
+        expected = solve_request(**inputs, seed=seed_for(key))
+        assert {name: line[name] for name in expected} == expected
+    again, submit = run(sections, batch, cache=cache)
+    assert not submit.calls
+    assert sorted(again, key=lambda line: line['student']) == sorted(lines, key=lambda line: line['student'])
+
+
+def test_seat_ledger_reserves_all_or_nothing():
+    seats = SeatLedger({'A': 1})
+    assert seats.reserve({'X': {'section': 'A'}, 'Y': {'section': 'B'}})
+    assert not seats.reserve({'Y': {'section': 'B'}, 'X': {'section': 'A'}})
+    # The refused schedule took no seat in B either
+    assert seats.taken == {('A', 'X'): 1, ('B', 'Y'): 1}
+    assert seats.restrict({'A': {'X': 'Mon | 8:00-9:00', 'Y': 'Tue | 8:00-9:00'}}) == {'A': {'Y': 'Tue | 8:00-9:00'}}
+
+
+@pytest.mark.parametrize('capacity', [0, 1, 2, 5])
+def test_capacity_is_never_exceeded(sections, capacity):
+    batch = students(16)
+    lines, submit = run(sections, batch, capacity=capacity, chunk_size=3, window=2)
+    assert sorted(line['student'] for line in lines) == list(range(16))
+    assert all(count <= capacity for count in seat_counts(lines).values())
+    # Only the seat-checked schedule is returned, and PSO is never run
+    assert all(set(line) == {'hybridSchedule', 'hybridScore', 'student'} for line in lines)
+    assert all(args[5] for args in submit.calls)
+
+
+def test_blocked_students_are_solved_against_the_remaining_offerings(sections):
+    batch = [(['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat'], [])] * 4
+    lines, submit = run(sections, batch, capacity=1)
+    assert len(lines) == 4 and all(count <= 1 for count in seat_counts(lines).values())
+    # One solve per round, each against a strictly smaller table
+    tables = [args[0] for args in submit.calls]
+    assert len(tables) > 1
+    sizes = [sum(map(len, table.values())) for table in tables]
+    assert sizes == sorted(sizes, reverse=True) and len(set(sizes)) == len(sizes)
+    for earlier, line in zip(tables, lines):
+        for subject, entry in line['hybridSchedule'].items():
+            assert subject in earlier[entry['section']]
+
+
+def test_failed_chunk_reports_each_of_its_students(sections):
+    def failing(fn, *args):
+        future = Future()
+        future.set_exception(RuntimeError('worker died'))
+        return future
+
+    lines = list(stream_cohort(failing, sections, YEAR_LEVEL, SEM_YEAR, students(4)))
+    assert sorted(line['student'] for line in lines) == [0, 1, 2, 3]
+    assert all(line['status'] == 'error' and line['message'] == 'worker died' for line in lines)
+
+
+def test_closing_the_stream_cancels_chunks_not_yet_run(sections):
+    inline = InlineSubmit()
+    parked = []
+
+    def submit(fn, *args):
+        # Only the first chunk completes; the rest stay queued on the "pool"
+        if not inline.calls:
+            return inline(fn, *args)
+        parked.append(Future())
+        return parked[-1]
+
+    batch = [(days, []) for days in (['Mon'], ['Tue'], ['Wed'], ['Thu'])]
+    stream = stream_cohort(submit, sections, YEAR_LEVEL, SEM_YEAR, batch, chunk_size=1, window=2)
+    next(stream)
+    stream.close()
+    assert parked and all(future.cancelled() for future in parked)
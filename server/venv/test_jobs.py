@@ -0,0 +1,130 @@
+"""JobQueue admission, cancellation, failure and caching.
+
+A stub executor hands back futures the tests complete by hand, so every
+state a worker can be in is reachable without a process pool.
+"""
+from concurrent.futures import Future
+
+import pytest
+
+import jobs
+from cache import ResultCache
+from jobs import JobQueue, QueueFull
+from metrics import Report
+
+
+class StubExecutor:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        self.submitted.append(future)
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+def finish(future, result):
+    if not future.running():
+        future.set_running_or_notify_cancel()
+    future.set_result((result, Report().to_dict()))
+
+
+def make_queue(**kwargs):
+    executor = StubExecutor()
+    return JobQueue(executor=executor, **kwargs), executor
+
+
+def test_pending_limit_raises_queue_full():
+    queue, executor = make_queue(max_pending=2)
+    queue.submit('a', {}, 1)
+    queue.submit('b', {}, 2)
+    with pytest.raises(QueueFull):
+        queue.submit('c', {}, 3)
+    assert len(executor.submitted) == 4
+
+
+def test_job_is_done_when_both_halves_finish_and_is_cached():
+    cache = ResultCache()
+    queue, executor = make_queue(cache=cache)
+    job = queue.submit('a', {}, 1)
+    first, second = executor.submitted
+    finish(first, {'hybridScore': 5})
+    assert job.status == 'running' and job.to_dict()['progress'] == 0.5
+    finish(second, {'psoScore': 4})
+    assert job.to_dict() == {'jobId': job.id, 'status': 'done', 'progress': 1.0,
+                             'result': {'hybridScore': 5, 'psoScore': 4}}
+    assert cache.get('a') == {'hybridScore': 5, 'psoScore': 4}
+
+
+def test_cached_submit_finishes_without_a_worker_or_a_slot():
+    cache = ResultCache()
+    cache.put('a', {'hybridScore': 5, 'psoScore': 4})
+    queue, executor = make_queue(cache=cache, max_pending=1)
+    queue.submit('b', {}, 2)
+    job = queue.submit('a', {}, 1)
+    assert job.status == 'done' and job.result == {'hybridScore': 5, 'psoScore': 4}
+    assert len(executor.submitted) == 2
+
+
+def test_failed_half_fails_the_job_and_cancels_the_other():
+    queue, executor = make_queue()
+    job = queue.submit('a', {}, 1)
+    first, second = executor.submitted
+    first.set_running_or_notify_cancel()
+    first.set_exception(RuntimeError('solver crashed'))
+    assert job.status == 'failed' and job.to_dict()['error'] == 'solver crashed'
+    assert second.cancelled()
+    assert queue.pending() == 0
+
+
+def test_cancelled_job_keeps_its_slot_until_running_halves_finish():
+    queue, executor = make_queue(max_pending=1)
+    job = queue.submit('a', {}, 1)
+    running, queued = executor.submitted
+    running.set_running_or_notify_cancel()
+    assert queue.cancel(job.id).status == 'cancelled'
+    assert queued.cancelled() and not running.cancelled()
+    assert queue.pending() == 1
+    with pytest.raises(QueueFull):
+        queue.submit('b', {}, 2)
+    # The late result is discarded but frees the slot
+    finish(running, {'hybridScore': 5})
+    assert job.status == 'cancelled' and job.result == {}
+    assert queue.pending() == 0
+    queue.submit('b', {}, 2)
+
+
+def test_tasks_count_as_pending_until_done():
+    queue, executor = make_queue(max_pending=1)
+    future = queue.submit_task(print)
+    assert queue.pending() == 1
+    with pytest.raises(QueueFull):
+        queue.check_capacity()
+    future.set_running_or_notify_cancel()
+    future.set_result(None)
+    assert queue.pending() == 0
+
+
+def test_finished_jobs_are_capped():
+    cache = ResultCache()
+    cache.put('a', {'hybridScore': 5, 'psoScore': 4})
+    queue, _ = make_queue(cache=cache, max_finished=3)
+    submitted = [queue.submit('a', {}, 1) for _ in range(10)]
+    assert len(queue._jobs) == 3
+    assert [queue.get(job.id) for job in submitted[-3:]] == submitted[-3:]
+    assert queue.get(submitted[0].id) is None
+
+
+def test_finished_jobs_expire_after_retention(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(jobs.time, 'monotonic', lambda: now[0])
+    queue, executor = make_queue(retention=60)
+    job = queue.submit('a', {}, 1)
+    for future in executor.submitted:
+        finish(future, {})
+    now[0] += 61
+    queue.submit('b', {}, 2)
+    assert queue.get(job.id) is None
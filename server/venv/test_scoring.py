@@ -0,0 +1,101 @@
+"""Randomized agreement checks between the three schedule scorers.
+
+fitness() on the JSON schedule is the reference. IncrementalSchedule's
+delta/assign/score and SwarmEncoding.score must give the same numbers for
+every schedule, including reassignments and clashing class times.
+"""
+import random
+
+import numpy as np
+import pytest
+
+from benchmark import synthetic_fixture
+from scheduler import ScheduleEvaluator, fitness, required_subjects_for, select_sections, solve_request
+from swarm import SwarmEncoding
+
+DAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']
+# Overlapping ranges, unmarked afternoon hours, explicit meridiems and
+# offerings with no parsable time all take different paths through model.py
+TIMES = ['7:00-8:30', '8:00-9:30', '9:00-10:00', '10:30-12:00', '1:00-2:30',
+         '2:00-3:30', '1:30 PM-3:00 PM', '11:00 AM-1:00 PM', 'TBA']
+
+
+def random_case(seed):
+    rng = random.Random(seed)
+    subjects = [f'SUBJ{n}' for n in range(rng.randint(1, 7))]
+    sections = {}
+    for n in range(rng.randint(1, 5)):
+        # Not every section offers every subject
+        offered = [subject for subject in subjects if rng.random() < 0.8]
+        sections[f'2_1_{n}'] = {subject: f'{rng.choice(DAYS)} | {rng.choice(TIMES)}' for subject in offered}
+    available_days = rng.sample(DAYS, rng.randint(0, len(DAYS)))
+    back_subjects = [subject for subject in subjects if rng.random() < 0.3]
+    return rng, ScheduleEvaluator(sections, available_days, back_subjects, subjects), available_days, back_subjects
+
+
+def reference(evaluator, state, available_days, back_subjects):
+    return fitness(state.schedule, available_days, back_subjects, evaluator.subjects)
+
+
+@pytest.mark.parametrize('seed', range(300))
+def test_incremental_matches_fitness(seed):
+    rng, evaluator, available_days, back_subjects = random_case(seed)
+    state = evaluator.new_schedule()
+    assert state.score == reference(evaluator, state, available_days, back_subjects)
+
+    offered = [s for s, candidates in enumerate(evaluator.compact.candidates) if candidates]
+    for _ in range(4 * len(offered)):
+        if not offered:
+            break
+        # Later picks often hit subjects that are already placed
+        s = rng.choice(offered)
+        j = rng.choice(evaluator.compact.candidates[s])
+        before = state.score
+        change = state.delta(s, j)
+        state.assign(s, j)
+        assert state.score == before + change
+        assert state.score == reference(evaluator, state, available_days, back_subjects)
+        assert evaluator.score_vector(state.sections) == state.score
+
+
+@pytest.mark.parametrize('seed', range(300))
+def test_best_candidate_matches_delta(seed):
+    rng, evaluator, _, _ = random_case(seed)
+    state = evaluator.new_schedule()
+    for s in rng.sample(range(len(evaluator.subjects)), len(evaluator.subjects)):
+        candidates = evaluator.compact.candidates[s]
+        if not candidates:
+            assert state.best_candidate(s) == -1
+            continue
+        # The fast path for unplaced subjects must pick what delta() ranks first
+        best = max(state.delta(s, j) for j in candidates)
+        assert state.delta(s, state.best_candidate(s)) == best
+        state.place_best(s)
+        if rng.random() < 0.5:
+            assert state.delta(s, state.best_candidate(s)) == max(state.delta(s, j) for j in candidates)
+
+
+@pytest.mark.parametrize('seed', range(300))
+def test_swarm_score_matches_fitness(seed):
+    rng, evaluator, available_days, back_subjects = random_case(seed)
+    encoding = SwarmEncoding(evaluator)
+    choices = np.array([
+        [rng.randrange(-1, len(candidates)) if candidates else -1 for candidates in evaluator.compact.candidates]
+        for _ in range(16)
+    ], dtype=np.int64).reshape(16, len(evaluator.subjects))
+    scores = encoding.score(choices)
+    for choice, score in zip(choices, scores):
+        state = encoding.to_schedule(choice)
+        assert score == state.score == reference(evaluator, state, available_days, back_subjects)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_solver_scores_match_returned_schedules(seed):
+    rng = random.Random(seed)
+    payload = synthetic_fixture(rng.randint(1, 4), rng.randint(1, 2), seed=seed)
+    available_days = rng.sample(DAYS, rng.randint(0, len(DAYS)))
+    sections = select_sections(payload['userData'], payload['yearLevel'], payload['semesterYear'])
+    result = solve_request(sections, payload['yearLevel'], payload['semesterYear'], available_days, [], seed)
+    required_subjects = required_subjects_for(payload['yearLevel'], payload['semesterYear'], [])
+    for name in ('hybrid', 'pso'):
+        assert result[f'{name}Score'] == fitness(result[f'{name}Schedule'], available_days, [], required_subjects)